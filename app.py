@@ -1,164 +1,441 @@
+import atexit
+import logging
 import os
+import queue
 import random
+import secrets
+import signal
 import sqlite3
-from datetime import datetime, timezone
+import sys
+import threading
+import time
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
-from flask import Flask, render_template, request, redirect, url_for, session
+from flask import (Flask, render_template, request, redirect, url_for, session,
+                   send_from_directory, make_response)
+from flask_session import Session
+from jinja2 import FileSystemBytecodeCache
 
 # ── Config ────────────────────────────────────────────────────────────────────
 APP_SECRET   = os.environ.get("SECRET_KEY", "dev-secret-change-me")
 FIG_DIR      = Path("figures")
+FIG_MAX_AGE  = 30 * 24 * 60 * 60  # figures only change on deploy
 DB_PATH      = Path("responses.db")
+JINJA_CACHE_DIR = Path(os.environ.get("JINJA_CACHE_DIR", ".jinja_cache"))
+SESSION_DIR  = Path(os.environ.get("SESSION_DIR", ".flask_session"))
+SESSION_LIFETIME = timedelta(hours=float(os.environ.get("SESSION_LIFETIME_HOURS", "12")))
+SESSION_FILE_THRESHOLD = int(os.environ.get("SESSION_FILE_THRESHOLD", "10000"))
+REDIS_URL    = os.environ.get("REDIS_URL")
 DATABASE_URL = os.environ.get("DATABASE_URL")
+DB_POOL_MAX  = int(os.environ.get("DB_POOL_MAX", "10"))
+WRITE_BATCH_SIZE     = int(os.environ.get("WRITE_BATCH_SIZE", "100"))
+WRITE_BATCH_INTERVAL = float(os.environ.get("WRITE_BATCH_INTERVAL_MS", "50")) / 1000
+WRITE_RETRY_DELAY    = float(os.environ.get("WRITE_RETRY_DELAY_MS", "1000")) / 1000
+
+log = logging.getLogger(__name__)
 
 # ── Questions ─────────────────────────────────────────────────────────────────
+Question = namedtuple("Question", "prompt choices correct")
+
 QUESTIONS = {
-    "Devin-Figure1-NoAids.png": {
-        "prompt": "Does Kit Kat have approximately more or less than 35% sugar?",
-        "choices": ["More", "Less", "About 35%"],
-        "correct": "Less",
-    },
-    "Devin-Figure2.png": {
-        "prompt": "Approximate the difference in sugar percentage between Milky Way and Twix.",
-        "choices": ["~3%", "~8%", "~15%", "~20%"],
-        "correct": "~8%",
-    },
-    "Devin-Figure3.png": {
-        "prompt": "Is there a larger gap in sugar percentage between Milky Way and Twix, or between Milky Way and Snickers?",
-        "choices": ["Milky Way and Twix", "Milky Way and Snickers", "The gap is about the same"],
-        "correct": "Milky Way and Snickers",
-    },
-    "Tim-Figure1-NoAids.png": {
-        "prompt": "What is the average win percent of pluribus candy?",
-        "choices": ["55%", "45%", "35%", "60%"],
-        "correct": "45%",
-    },
-    "Tim-Figure2.png": {
-        "prompt": "Which Candy is closest to 60% win percent?",
-        "choices": ["Bar", "Chocolate", "Nougat", "Caramel"],
-        "correct": "Nougat",
-    },
-    "Tim-Figure3.png": {
-        "prompt": "What is the win percent difference between fruity and hard candy?",
-        "choices": ["5%", "10%", "20%", "30%"],
-        "correct": "5%",
-    },
-    "Donovan-Figure1-NoAids.png": {
-        "prompt": "What sugar has the highest average Price Percentage?",
-        "choices": ["Low", "Medium", "High", "All Equal"],
-        "correct": "Medium",
-    },
-    "Donovan-Figure2.png": {
-        "prompt": "What is the Average Price Percentage of High Sugar candies?",
-        "choices": ["0.35", "0.45", "0.8", "0.51"],
-        "correct": "0.51",
-    },
-    "Donovan-Figure3.png": {
-        "prompt": "What is the Approximate difference between low and high sugar candies?",
-        "choices": ["No Difference", "0.25", "0.03", "0.5"],
-        "correct": "0.25",
-    },
-    "Branden-Figure1-NoAids.png": {
-        "prompt": "Which sugar category has the highest average popularity?",
-        "choices": ["Low sugar", "Medium sugar", "High sugar", "All are equal"],
-        "correct": "Medium sugar",
-    },
-    "Branden-Figure2.png": {
-        "prompt": "Medium sugar candies are approximately",
-        "choices": ["Below 50%", "Exactly 50%", "Slightly above 50%", "Above 70%"],
-        "correct": "Slightly above 50%",
-    },
-    "Branden-Figure3.png": {
-        "prompt": "About how much higher is Medium sugar compared to High sugar?",
-        "choices": ["1-2%", "5-6%", "10%", "20%"],
-        "correct": "1-2%",
-    },
+    "Devin-Figure1-NoAids.png": Question(
+        prompt="Does Kit Kat have approximately more or less than 35% sugar?",
+        choices=("More", "Less", "About 35%"),
+        correct="Less",
+    ),
+    "Devin-Figure2.png": Question(
+        prompt="Approximate the difference in sugar percentage between Milky Way and Twix.",
+        choices=("~3%", "~8%", "~15%", "~20%"),
+        correct="~8%",
+    ),
+    "Devin-Figure3.png": Question(
+        prompt="Is there a larger gap in sugar percentage between Milky Way and Twix, or between Milky Way and Snickers?",
+        choices=("Milky Way and Twix", "Milky Way and Snickers", "The gap is about the same"),
+        correct="Milky Way and Snickers",
+    ),
+    "Tim-Figure1-NoAids.png": Question(
+        prompt="What is the average win percent of pluribus candy?",
+        choices=("55%", "45%", "35%", "60%"),
+        correct="45%",
+    ),
+    "Tim-Figure2.png": Question(
+        prompt="Which Candy is closest to 60% win percent?",
+        choices=("Bar", "Chocolate", "Nougat", "Caramel"),
+        correct="Nougat",
+    ),
+    "Tim-Figure3.png": Question(
+        prompt="What is the win percent difference between fruity and hard candy?",
+        choices=("5%", "10%", "20%", "30%"),
+        correct="5%",
+    ),
+    "Donovan-Figure1-NoAids.png": Question(
+        prompt="What sugar has the highest average Price Percentage?",
+        choices=("Low", "Medium", "High", "All Equal"),
+        correct="Medium",
+    ),
+    "Donovan-Figure2.png": Question(
+        prompt="What is the Average Price Percentage of High Sugar candies?",
+        choices=("0.35", "0.45", "0.8", "0.51"),
+        correct="0.51",
+    ),
+    "Donovan-Figure3.png": Question(
+        prompt="What is the Approximate difference between low and high sugar candies?",
+        choices=("No Difference", "0.25", "0.03", "0.5"),
+        correct="0.25",
+    ),
+    "Branden-Figure1-NoAids.png": Question(
+        prompt="Which sugar category has the highest average popularity?",
+        choices=("Low sugar", "Medium sugar", "High sugar", "All are equal"),
+        correct="Medium sugar",
+    ),
+    "Branden-Figure2.png": Question(
+        prompt="Medium sugar candies are approximately",
+        choices=("Below 50%", "Exactly 50%", "Slightly above 50%", "Above 70%"),
+        correct="Slightly above 50%",
+    ),
+    "Branden-Figure3.png": Question(
+        prompt="About how much higher is Medium sugar compared to High sugar?",
+        choices=("1-2%", "5-6%", "10%", "20%"),
+        correct="1-2%",
+    ),
 }
 
-DEFAULT_QUESTION = {
-    "prompt": "Based on the figure, which option best answers the question?",
-    "choices": ["A", "B", "C", "D"],
-    "correct": None,
-}
+DEFAULT_QUESTION = Question(
+    prompt="Based on the figure, which option best answers the question?",
+    choices=("A", "B", "C", "D"),
+    correct=None,
+)
+
+# Flat lookups for the request handlers; _scan_figures() adds default prompts for
+# any figure without a dedicated question.
+FIG_PROMPTS = {fig: q.prompt for fig, q in QUESTIONS.items()}
+FIG_CORRECT = {fig: q.correct for fig, q in QUESTIONS.items()}
 
 # ── Database helpers ──────────────────────────────────────────────────────────
-def _placeholder():
-    """Return the correct parameter placeholder for the active DB driver."""
-    return "%s" if DATABASE_URL else "?"
+_PH = "%s" if DATABASE_URL else "?"  # parameter placeholder for the active driver
+
+_INSERT_SQL_TEMPLATE = """
+    INSERT INTO responses (ts, user_id, figure, question, choice, correct_choice, is_correct)
+    VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})
+"""
+_INSERT_SQL = _INSERT_SQL_TEMPLATE.format(ph=_PH)
+
+_STATS_VERSION_SQL = """
+    SELECT MAX(ts), COUNT(*)
+    FROM responses
+"""
+
+_FIG_STATS_SQL = """
+    SELECT figure, COUNT(*), SUM(is_correct)
+    FROM responses
+    GROUP BY figure
+"""
 
 
+@lru_cache(maxsize=8)
+def _pivot_sql(n_figures):
+    """One row per participant with an answer column per figure (figures bound as params).
+
+    If a figure was answered twice (e.g. a double-submitted form), the first
+    answer is shown; ``first`` holds the lowest id per (user_id, figure).
+    """
+    answer_cols = "".join(
+        f",\n           COALESCE(MAX(CASE WHEN first.id IS NOT NULL AND r.figure = {_PH} THEN r.choice END), '—')"
+        for _ in range(n_figures)
+    )
+    return f"""
+    SELECT r.user_id, MIN(r.ts), SUM(r.is_correct){answer_cols}
+    FROM responses r
+    LEFT JOIN (SELECT MIN(id) AS id FROM responses GROUP BY user_id, figure) first
+        ON first.id = r.id
+    GROUP BY r.user_id
+    ORDER BY MIN(r.ts)
+"""
+
+
+_pg_pool = None
+_pg_pool_lock = threading.Lock()
+# getconn() raises PoolError when every connection is out; this makes callers wait.
+_pg_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_sqlite_local = threading.local()
+
+
+def _get_pg_pool():
+    """Create the Postgres pool lazily so each (forked) worker builds its own."""
+    global _pg_pool
+    if _pg_pool is None:
+        with _pg_pool_lock:
+            if _pg_pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+                _pg_pool = ThreadedConnectionPool(1, DB_POOL_MAX, DATABASE_URL)
+    return _pg_pool
+
+
+def _get_sqlite_conn():
+    """Return this thread's SQLite connection, opening it on first use.
+
+    Connections are only reused by long-lived worker threads (gunicorn gthread,
+    the response writer); a thread-per-request server opens one per request.
+    """
+    conn = getattr(_sqlite_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _sqlite_local.conn = conn
+    return conn
+
+
+@contextmanager
 def get_conn():
+    """Borrow a reusable connection; commits on success, rolls back on error."""
     if DATABASE_URL:
-        import psycopg2
-        return psycopg2.connect(DATABASE_URL)
-    return sqlite3.connect(DB_PATH)
+        pool = _get_pg_pool()
+        with _pg_pool_slots:
+            conn = pool.getconn()
+            try:
+                with conn:
+                    yield conn
+            finally:
+                pool.putconn(conn)
+    else:
+        conn = _get_sqlite_conn()
+        with conn:
+            yield conn
+
+
+_CREATE_TABLE_PG = """
+    CREATE TABLE IF NOT EXISTS responses (
+        id SERIAL PRIMARY KEY,
+        ts BIGINT NOT NULL,
+        user_id TEXT NOT NULL,
+        figure TEXT NOT NULL,
+        question TEXT NOT NULL,
+        choice TEXT NOT NULL,
+        correct_choice TEXT,
+        is_correct INTEGER NOT NULL DEFAULT 0
+    )
+"""
+_CREATE_TABLE_SQLITE = """
+    CREATE TABLE IF NOT EXISTS responses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts BIGINT NOT NULL,
+        user_id TEXT NOT NULL,
+        figure TEXT NOT NULL,
+        question TEXT NOT NULL,
+        choice TEXT NOT NULL,
+        correct_choice TEXT,
+        is_correct INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+
+def _migrate_ts_to_ns(cur):
+    """Convert a legacy ISO-8601 TEXT ``ts`` column to integer nanoseconds since the epoch."""
+    if DATABASE_URL:
+        cur.execute("""
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'responses' AND column_name = 'ts'
+        """)
+        if cur.fetchone()[0] != "text":
+            return
+        cur.execute("""
+            ALTER TABLE responses ALTER COLUMN ts TYPE BIGINT
+                USING (EXTRACT(EPOCH FROM ts::timestamptz) * 1000000000)::BIGINT
+        """)
+        return
+
+    # SQLite can't change a column's type in place, so rebuild the table.
+    cur.execute("PRAGMA table_info(responses)")
+    if next(row[2] for row in cur.fetchall() if row[1] == "ts").upper() != "TEXT":
+        return
+    cur.execute("ALTER TABLE responses RENAME TO responses_old")
+    cur.execute(_CREATE_TABLE_SQLITE)
+    cur.execute("""
+        INSERT INTO responses (id, ts, user_id, figure, question, choice, correct_choice, is_correct)
+        SELECT id, CAST(ROUND((julianday(ts) - 2440587.5) * 86400000) AS INTEGER) * 1000000,
+               user_id, figure, question, choice, correct_choice, is_correct
+        FROM responses_old
+    """)
+    cur.execute("DROP TABLE responses_old")
 
 
 def init_db():
     with get_conn() as conn:
         cur = conn.cursor()
+        cur.execute(_CREATE_TABLE_PG if DATABASE_URL else _CREATE_TABLE_SQLITE)
+        # Older databases allowed NULL for questions without a correct answer;
+        # correct_choice IS NULL already records that, so store 0 instead.
+        cur.execute("UPDATE responses SET is_correct = 0 WHERE is_correct IS NULL")
         if DATABASE_URL:
             cur.execute("""
-                CREATE TABLE IF NOT EXISTS responses (
-                    id SERIAL PRIMARY KEY,
-                    ts TEXT NOT NULL,
-                    user_id TEXT NOT NULL,
-                    figure TEXT NOT NULL,
-                    question TEXT NOT NULL,
-                    choice TEXT NOT NULL,
-                    correct_choice TEXT,
-                    is_correct INTEGER
-                )
-            """)
-        else:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS responses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ts TEXT NOT NULL,
-                    user_id TEXT NOT NULL,
-                    figure TEXT NOT NULL,
-                    question TEXT NOT NULL,
-                    choice TEXT NOT NULL,
-                    correct_choice TEXT,
-                    is_correct INTEGER
-                )
+                ALTER TABLE responses
+                    ALTER COLUMN is_correct SET DEFAULT 0,
+                    ALTER COLUMN is_correct SET NOT NULL
             """)
+        _migrate_ts_to_ns(cur)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_user_ts ON responses(user_id, ts)")
+        cur.execute("DROP INDEX IF EXISTS idx_responses_figure")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_figure_correct ON responses(figure, is_correct)")
         conn.commit()
 
 
-def insert_response(user_id, figure, question, choice, correct_choice, is_correct):
-    ph = _placeholder()
-    sql = f"""
-        INSERT INTO responses (ts, user_id, figure, question, choice, correct_choice, is_correct)
-        VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})
+# ── Batched writes ────────────────────────────────────────────────────────────
+# Survey answers are queued and written by a background thread, which commits up
+# to WRITE_BATCH_SIZE rows per transaction, waiting at most WRITE_BATCH_INTERVAL
+# for a batch to fill. A threading.Event on the queue marks a flush request.
+# If a batch fails, its rows are retried one at a time: rows that hit a
+# connection or locking error are queued again, while rows the database rejects
+# outright are logged and dropped so they can't hold back everyone else's answers.
+_write_queue = queue.SimpleQueue()
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+
+def _transient_db_errors():
+    """Exception types worth retrying: lost connections and lock/deadlock failures."""
+    if DATABASE_URL:
+        import psycopg2
+        return (psycopg2.OperationalError, psycopg2.InterfaceError)
+    return (sqlite3.OperationalError, sqlite3.InterfaceError)
+
+
+def _insert_rows(rows):
+    with get_conn() as conn:
+        conn.cursor().executemany(_INSERT_SQL, rows)
+
+
+def _write_batch(rows):
+    """Insert ``rows``; return the ones that failed transiently and should be retried."""
+    transient = _transient_db_errors()
+    try:
+        _insert_rows(rows)
+        return []
+    except transient:
+        log.warning("Failed to write %d survey responses; will retry", len(rows), exc_info=True)
+        return rows
+    except Exception:
+        if len(rows) == 1:
+            log.exception("Dropping survey response from %s for %s", rows[0][1], rows[0][2])
+            return []
+
+    retry = []
+    for row in rows:
+        try:
+            _insert_rows([row])
+        except transient:
+            log.warning("Failed to write survey response; will retry", exc_info=True)
+            retry.append(row)
+        except Exception:
+            log.exception("Dropping survey response from %s for %s", row[1], row[2])
+    return retry
+
+
+def _writer_loop():
+    while True:
+        rows, flushes = [], []
+        item = _write_queue.get()  # block until there is work
+        deadline = time.monotonic() + WRITE_BATCH_INTERVAL
+        while True:
+            if isinstance(item, threading.Event):
+                flushes.append(item)
+                break
+            rows.append(item)
+            timeout = deadline - time.monotonic()
+            if len(rows) >= WRITE_BATCH_SIZE or timeout <= 0:
+                break
+            try:
+                item = _write_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+        retry = _write_batch(rows) if rows else []
+        if retry:
+            # Re-queue the rows, and any flush waiting on them, then back off
+            for item in retry + flushes:
+                _write_queue.put(item)
+            time.sleep(WRITE_RETRY_DELAY)
+            continue
+        for done in flushes:
+            done.set()
+
+
+def _ensure_writer():
+    global _writer_thread
+    if _writer_thread is None:
+        with _writer_lock:
+            if _writer_thread is None:
+                _writer_thread = threading.Thread(
+                    target=_writer_loop, name="response-writer", daemon=True)
+                _writer_thread.start()
+
+
+def flush_responses(timeout=None):
+    """Block until every response queued so far has been handled.
+
+    Returns False if ``timeout`` ran out first.
     """
+    if _writer_thread is None:
+        return True
+    done = threading.Event()
+    _write_queue.put(done)
+    return done.wait(timeout)
+
+
+def _flush_on_sigterm(signum, frame):
+    flush_responses(5)
+    if _previous_sigterm is signal.SIG_DFL:
+        sys.exit(128 + signum)
+    if callable(_previous_sigterm):
+        _previous_sigterm(signum, frame)
+
+
+# atexit covers normal interpreter shutdown, including gunicorn's graceful worker
+# exit. The dev server (see __main__) also installs _flush_on_sigterm, since a
+# default SIGTERM kills it without running atexit.
+atexit.register(flush_responses, 5)
+_previous_sigterm = None
+
+
+def insert_response(user_id, figure, question, choice, correct_choice, is_correct):
+    _ensure_writer()
+    _write_queue.put((
+        time.time_ns(),
+        user_id, figure, question, choice, correct_choice, is_correct,
+    ))
+
+
+def fetch_stats_version():
+    """Return (latest ts, row count), which changes whenever a response is written."""
     with get_conn() as conn:
-        conn.cursor().execute(sql, (
-            datetime.now(timezone.utc).isoformat(),
-            user_id, figure, question, choice, correct_choice, is_correct,
-        ))
-        conn.commit()
+        cur = conn.cursor()
+        cur.execute(_STATS_VERSION_SQL)
+        return cur.fetchone()
+
+
+def fetch_figure_stats():
+    """Return (figure, responses, correct) rows aggregated per figure."""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(_FIG_STATS_SQL)
+        return cur.fetchall()
 
 
+def fetch_pivot(figures):
+    """Return (user_id, first_ts, correct, *answers) rows ordered by first response.
 
-def fetch_responses():
-    sql = """
-        SELECT ts, user_id, figure, choice, correct_choice, is_correct
-        FROM responses
-        ORDER BY ts DESC
+    ``answers`` follows the order of ``figures``; unanswered figures are "—".
     """
     with get_conn() as conn:
-        if DATABASE_URL:
-            import psycopg2.extras
-            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        else:
-            conn.row_factory = sqlite3.Row
-            cur = conn.cursor()
-        cur.execute(sql)
+        cur = conn.cursor()
+        cur.execute(_pivot_sql(len(figures)), tuple(figures))
         return cur.fetchall()
 
 
@@ -166,17 +443,72 @@ def fetch_responses():
 app = Flask(__name__)
 app.secret_key = APP_SECRET
 
+# Keep session data server-side so the cookie only carries a short session id.
+# Redis when configured (shared across nodes), otherwise files on local disk.
+# Stored sessions stop being readable after SESSION_LIFETIME. Redis deletes them
+# itself; the file cache only deletes files once it holds more than
+# SESSION_FILE_THRESHOLD, removing expired sessions first and evicting the live
+# sessions closest to expiry only if that isn't enough.
+if REDIS_URL:
+    import redis
+    app.config["SESSION_TYPE"] = "redis"
+    app.config["SESSION_REDIS"] = redis.Redis.from_url(REDIS_URL)
+else:
+    from cachelib.file import FileSystemCache
+    app.config["SESSION_TYPE"] = "cachelib"
+    app.config["SESSION_CACHELIB"] = FileSystemCache(str(SESSION_DIR), threshold=SESSION_FILE_THRESHOLD)
+app.config["PERMANENT_SESSION_LIFETIME"] = SESSION_LIFETIME
+app.config["SESSION_PERMANENT"] = False
+app.config["SESSION_ID_LENGTH"] = 16
+Session(app)
+
+
+def _jinja_bytecode_cache():
+    """Return a bytecode cache in JINJA_CACHE_DIR, or None if it can't be written."""
+    try:
+        JINJA_CACHE_DIR.mkdir(exist_ok=True)
+    except OSError:
+        log.warning("Can't create %s; running without a template bytecode cache", JINJA_CACHE_DIR)
+        return None
+    if not os.access(JINJA_CACHE_DIR, os.W_OK):
+        log.warning("%s isn't writable; running without a template bytecode cache", JINJA_CACHE_DIR)
+        return None
+    return FileSystemBytecodeCache(str(JINJA_CACHE_DIR))
+
+
+# Share compiled template bytecode across workers and restarts, and compile the
+# templates up front so the first request to each page isn't penalized.
+app.jinja_env.bytecode_cache = _jinja_bytecode_cache()
+for _template in ("home.html", "survey.html", "complete.html", "stats.html"):
+    app.jinja_env.get_template(_template)
+
+
+@lru_cache(maxsize=1)
+def _scan_figures(mtime_ns):
+    """Scan FIG_DIR once per directory mtime; the result is shared by all requests."""
+    # Interned so dict lookups keyed by figure name can short-circuit on identity
+    figures = tuple(sorted(sys.intern(p.name) for p in FIG_DIR.iterdir() if p.suffix.lower() == ".png"))
+    for fig in figures:
+        FIG_PROMPTS.setdefault(fig, DEFAULT_QUESTION.prompt)
+    return figures
+
 
 def list_figures():
-    if not FIG_DIR.exists():
-        return []
-    return sorted(p.name for p in FIG_DIR.iterdir() if p.suffix.lower() == ".png")
+    # A single stat() keeps the cache fresh if figures are added while running.
+    try:
+        mtime_ns = FIG_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        return ()
+    return _scan_figures(mtime_ns)
 
 
 @app.route("/figures/<path:filename>")
 def figures(filename):
-    from flask import send_from_directory
-    return send_from_directory(FIG_DIR, filename)
+    # Prefer serving /figures/ from the front-end server in production; when it
+    # does reach Flask, let browsers keep the PNGs instead of re-fetching them.
+    response = send_from_directory(FIG_DIR, filename, max_age=FIG_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
 
 
 @app.route("/")
@@ -186,34 +518,36 @@ def home():
 
 @app.route("/start", methods=["POST"])
 def start():
-    figs = list_figures()
-    random.shuffle(figs)
-    session["user_id"] = os.urandom(8).hex()
+    # Only the shuffle seed is stored; survey() rebuilds the order from it
+    session["user_id"] = secrets.token_urlsafe(6)
     session["idx"] = 0
-    session["figs"] = figs
+    session["seed"] = int.from_bytes(os.urandom(8), "big")
     return redirect(url_for("survey"))
 
 
 @app.route("/survey", methods=["GET", "POST"])
 def survey():
-    figs = session.get("figs") or list_figures()
+    figs = list_figures()
+    seed = session.get("seed")
+    if seed is not None:
+        figs = list(figs)
+        random.Random(seed).shuffle(figs)
     idx  = session.get("idx", 0)
 
     if idx >= len(figs):
         return redirect(url_for("complete"))
 
     fig_name = figs[idx]
-    q = QUESTIONS.get(fig_name, DEFAULT_QUESTION)
 
     if request.method == "POST":
         choice  = request.form.get("choice", "")
-        correct = q.get("correct")
-        is_correct = None if correct is None else int(choice == correct)
+        correct = FIG_CORRECT.get(fig_name)
+        is_correct = int(correct is not None and choice == correct)
 
         insert_response(
             user_id=session.get("user_id", "unknown"),
             figure=fig_name,
-            question=q["prompt"],
+            question=FIG_PROMPTS[fig_name],
             choice=choice,
             correct_choice=correct,
             is_correct=is_correct,
@@ -221,6 +555,7 @@ def survey():
         session["idx"] = idx + 1
         return redirect(url_for("survey"))
 
+    q = QUESTIONS.get(fig_name, DEFAULT_QUESTION)
     pct = int(idx / len(figs) * 100)
     return render_template("survey.html", fig=fig_name, q=q,
                            idx=idx, n=len(figs), pct=pct)
@@ -233,57 +568,52 @@ def complete():
 
 @app.route("/stats")
 def stats():
+    # The page only changes when a response lands (or the figure set changes), so
+    # answer revalidations with a 304 and reuse HTML rendered for the same version.
     figures = list_figures()
-
-    # Pivot raw responses into one row per participant, one column per figure
-    raw = fetch_responses()
-    user_answers = {}   # {user_id: {figure: choice}}
-    user_first_ts = {}  # {user_id: earliest ts} for row ordering
-    user_correct  = {}  # {user_id: correct count}
-    for r in raw:
-        uid = r["user_id"]
-        if uid not in user_answers:
-            user_answers[uid] = {}
-            user_first_ts[uid] = r["ts"]
-            user_correct[uid]  = 0
-        user_answers[uid][r["figure"]] = r["choice"]
-        if r["is_correct"]:
-            user_correct[uid] += 1
-
+    latest_ts, n_responses = fetch_stats_version()
+    etag = f"{latest_ts}-{n_responses}-{zlib.crc32(chr(0).join(figures).encode()):08x}"
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(_render_stats(etag, figures))
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    return response
+
+
+@lru_cache(maxsize=4)
+def _render_stats(etag, figures):
+    # One row per participant, one column per figure — aggregated in the database
     pivot = [
         {
             "user_id": uid[:8],
-            "ts": user_first_ts[uid][:19].replace("T", " "),
-            "answers": [user_answers[uid].get(fig, "—") for fig in figures],
-            "correct": user_correct[uid],
+            "ts": datetime.fromtimestamp(first_ts // 1_000_000_000, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "answers": answers,
+            "correct": correct,
         }
-        for uid in sorted(user_answers, key=lambda u: user_first_ts[u])
+        for uid, first_ts, correct, *answers in fetch_pivot(figures)
     ]
 
     # Per-figure accuracy summary
-    fig_totals  = {fig: 0 for fig in figures}
-    fig_correct = {fig: 0 for fig in figures}
-    for r in raw:
-        fig = r["figure"]
-        if fig in fig_totals:
-            fig_totals[fig] += 1
-            if r["is_correct"]:
-                fig_correct[fig] += 1
-
-    fig_stats = [
-        {
+    fig_counts = {sys.intern(fig): (total, correct) for fig, total, correct in fetch_figure_stats()}
+    fig_stats = []
+    for fig in figures:
+        total, correct = fig_counts.get(fig, (0, 0))
+        fig_stats.append({
             "figure":   fig,
-            "question": QUESTIONS.get(fig, DEFAULT_QUESTION)["prompt"],
-            "correct":  fig_correct[fig],
-            "total":    fig_totals[fig],
-            "accuracy": round(fig_correct[fig] / fig_totals[fig] * 100, 1) if fig_totals[fig] else None,
-        }
-        for fig in figures
-    ]
+            "question": FIG_PROMPTS[fig],
+            "correct":  correct,
+            "total":    total,
+            "accuracy": round(correct / total * 100, 1) if total else None,
+        })
 
     return render_template("stats.html", figures=figures, pivot=pivot, fig_stats=fig_stats)
 
 
 if __name__ == "__main__":
     init_db()
-    app.run(debug=True, port=8080)
+    _previous_sigterm = signal.signal(signal.SIGTERM, _flush_on_sigterm)
+    # Werkzeug's reloader replaces the SIGTERM handler and SIGKILLs the server
+    # process on shutdown, which would skip flushing queued responses.
+    app.run(debug=True, port=8080, use_reloader=False)
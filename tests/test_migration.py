@@ -0,0 +1,89 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+
+import app
+
+# responses table as created before timestamps became integer nanoseconds
+BASELINE_SCHEMA = """
+    CREATE TABLE responses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        figure TEXT NOT NULL,
+        question TEXT NOT NULL,
+        choice TEXT NOT NULL,
+        correct_choice TEXT,
+        is_correct INTEGER
+    )
+"""
+
+BASELINE_ROWS = [
+    ("2024-01-02T03:04:05.123456+00:00", "u1", "Tim-Figure2.png", "q", "Nougat", "Nougat", 1),
+    ("2024-01-02T03:05:00.000001+00:00", "u1", "Tim-Figure3.png", "q", "10%", "5%", 0),
+    ("2024-01-03T10:00:00+00:00", "u2", "Extra.png", "q", "A", None, None),
+]
+
+
+def _ns(iso):
+    return int(datetime.fromisoformat(iso).timestamp() * 1000) * 1_000_000
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "responses.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(BASELINE_SCHEMA)
+    conn.execute("CREATE INDEX idx_responses_figure ON responses(figure)")
+    conn.executemany("""
+        INSERT INTO responses (ts, user_id, figure, question, choice, correct_choice, is_correct)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, BASELINE_ROWS)
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(app, "DATABASE_URL", None)
+    monkeypatch.setattr(app, "DB_PATH", db_path)
+    monkeypatch.setattr(app, "_sqlite_local", threading.local())
+    return db_path
+
+
+def _dump(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = {row[1]: (row[2], row[3]) for row in conn.execute("PRAGMA table_info(responses)")}
+        rows = conn.execute("""
+            SELECT id, ts, typeof(ts), user_id, figure, choice, correct_choice, is_correct
+            FROM responses ORDER BY id
+        """).fetchall()
+        indexes = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'responses'"
+        ) if not row[0].startswith("sqlite_")}
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+    return columns, rows, indexes, tables
+
+
+def test_init_db_converts_baseline_schema(legacy_db):
+    app.init_db()
+
+    columns, rows, indexes, tables = _dump(legacy_db)
+    assert columns["ts"] == ("BIGINT", 1)
+    assert columns["is_correct"] == ("INTEGER", 1)
+    assert "responses_old" not in tables
+    assert indexes == {"idx_responses_user_ts", "idx_responses_figure_correct"}
+    assert rows == [
+        (1, _ns(BASELINE_ROWS[0][0]), "integer", "u1", "Tim-Figure2.png", "Nougat", "Nougat", 1),
+        (2, _ns(BASELINE_ROWS[1][0]), "integer", "u1", "Tim-Figure3.png", "10%", "5%", 0),
+        (3, _ns(BASELINE_ROWS[2][0]), "integer", "u2", "Extra.png", "A", None, 0),
+    ]
+
+
+def test_init_db_is_idempotent(legacy_db):
+    app.init_db()
+    first = _dump(legacy_db)
+    app.init_db()
+    assert _dump(legacy_db) == first
@@ -0,0 +1,36 @@
+import sqlite3
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "DATABASE_URL", None)
+    monkeypatch.setattr(app, "DB_PATH", tmp_path / "responses.db")
+    monkeypatch.setattr(app, "_sqlite_local", threading.local())
+    app.init_db()
+    return app.DB_PATH
+
+
+def _insert(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    conn.executemany(app._INSERT_SQL, rows)
+    conn.commit()
+    conn.close()
+
+
+def test_pivot_shows_first_answer_for_repeated_figure(db):
+    _insert(db, [
+        (1, "u1", "A.png", "q", "Apple", None, 0),
+        (2, "u1", "A.png", "q", "Zebra", None, 0),  # double-submitted answer
+        (3, "u1", "B.png", "q", "Yes", "Yes", 1),
+        (4, "u2", "B.png", "q", "No", "Yes", 0),
+    ])
+
+    assert app.fetch_pivot(("A.png", "B.png", "C.png")) == [
+        ("u1", 1, 1, "Apple", "Yes", "—"),
+        ("u2", 4, 0, "—", "No", "—"),
+    ]
@@ -0,0 +1,62 @@
+import sqlite3
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "DATABASE_URL", None)
+    monkeypatch.setattr(app, "DB_PATH", tmp_path / "responses.db")
+    monkeypatch.setattr(app, "_sqlite_local", threading.local())
+    monkeypatch.setattr(app, "WRITE_RETRY_DELAY", 0.01)
+    app.init_db()
+    return app.DB_PATH
+
+
+def _choices(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(row[0] for row in conn.execute("SELECT choice FROM responses"))
+    finally:
+        conn.close()
+
+
+def _queue(*choices):
+    for choice in choices:
+        app.insert_response("u1", "A.png", "q", choice, None, 0)
+
+
+def test_rejected_row_is_dropped_without_blocking_its_batch(db, monkeypatch):
+    insert_rows = app._insert_rows
+
+    def reject_nul(rows):
+        if any("\x00" in row[4] for row in rows):
+            raise ValueError("A string literal cannot contain NUL (0x00) characters.")
+        insert_rows(rows)
+
+    monkeypatch.setattr(app, "_insert_rows", reject_nul)
+    _queue("a", "b\x00", "c")
+
+    assert app.flush_responses(5)
+    assert _choices(db) == ["a", "c"]
+
+
+def test_transient_failure_is_retried_before_flush_returns(db, monkeypatch):
+    insert_rows = app._insert_rows
+    calls = []
+
+    def locked_once(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        insert_rows(rows)
+
+    monkeypatch.setattr(app, "_insert_rows", locked_once)
+    _queue("a", "b")
+
+    assert app.flush_responses(5)
+    assert _choices(db) == ["a", "b"]
+    assert len(calls) >= 2